@@ -0,0 +1,152 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class InMemoryBackend:
+    """
+    LRU-bounded in-memory storage for :class:`LLMCache`.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept; the least
+            recently used entry is evicted when the bound is exceeded.
+
+    Examples:
+        >>> backend = InMemoryBackend(max_entries=2)
+        >>> backend.set("a", "1")
+        >>> backend.get("a")
+        '1'
+        >>> backend.set("b", "2")
+        >>> backend.set("c", "3")
+        >>> backend.get("a") is None
+        True
+        >>> backend.get("c")
+        '3'
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str):
+        """
+        Returns the stored value for key, or None; refreshes LRU order.
+
+        Examples:
+            >>> backend = InMemoryBackend()
+            >>> backend.get("missing") is None
+            True
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value) -> None:
+        """
+        Stores value under key, evicting the oldest entry if full.
+
+        Examples:
+            >>> backend = InMemoryBackend(max_entries=1)
+            >>> backend.set("a", "1")
+            >>> backend.set("b", "2")
+            >>> backend.get("a") is None
+            True
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class LLMCache:
+    """
+    Cache for deterministic LLM responses.
+
+    Responses are cached only for deterministic calls (temperature 0);
+    :meth:`cache_key` returns None otherwise so callers skip caching
+    without extra branching. Entries expire after ``ttl_seconds``.
+
+    Examples:
+        >>> cache = LLMCache(InMemoryBackend(max_entries=8), ttl_seconds=3600)
+        >>> key = cache.cache_key("gpt-4o-mini", [{"role": "user", "content": "hi"}], 0.0)
+        >>> key is not None
+        True
+        >>> cache.get(key) is None
+        True
+        >>> cache.set(key, "hello!")
+        >>> cache.get(key)
+        'hello!'
+
+        >>> # Non-deterministic calls are never cached
+        >>> cache.cache_key("gpt-4o-mini", [], 0.7) is None
+        True
+    """
+
+    def __init__(self, backend: Optional[InMemoryBackend] = None, ttl_seconds: float = 3600):
+        self.backend = backend if backend is not None else InMemoryBackend()
+        self.ttl_seconds = ttl_seconds
+
+    def cache_key(
+        self,
+        model: str,
+        messages: list,
+        temperature: float,
+        max_tokens: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Returns a stable key for the request, or None if it should not be cached.
+
+        Examples:
+            >>> cache = LLMCache()
+            >>> key1 = cache.cache_key("m", [{"role": "user", "content": "hi"}], 0.0)
+            >>> key2 = cache.cache_key("m", [{"role": "user", "content": "hi"}], 0.0)
+            >>> key1 == key2
+            True
+            >>> key1 == cache.cache_key("m", [{"role": "user", "content": "yo"}], 0.0)
+            False
+        """
+        if temperature > 0:
+            return None
+        payload = json.dumps(
+            [model, messages, temperature, max_tokens],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached response for key, or None if absent or expired.
+
+        Examples:
+            >>> cache = LLMCache(ttl_seconds=0)
+            >>> key = cache.cache_key("m", [], 0.0)
+            >>> cache.set(key, "stale")
+            >>> cache.get(key) is None
+            True
+        """
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            return None
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Stores a response under key with the current timestamp.
+
+        Examples:
+            >>> cache = LLMCache()
+            >>> key = cache.cache_key("m", [], 0.0)
+            >>> cache.set(key, "response")
+            >>> cache.get(key)
+            'response'
+        """
+        self.backend.set(key, (time.monotonic(), value))
@@ -1,6 +1,8 @@
-from .consts import MessageType
+import re
+
+from .consts import MessageType, RoleType
 from .message import Message
-from typing import Iterator, Callable, Any, Iterable
+from typing import Iterator, Callable, Any, Iterable, Optional
 
 
 class Chat:
@@ -48,6 +50,8 @@ class Chat:
     """
 
     _messages: list[Message]
+    _role_index: Optional[dict[str, list[Message]]]
+    _token_index: Optional[set[str]]
 
     def __init__(self, *messages: MessageType):
         """
@@ -76,6 +80,8 @@ class Chat:
             'user'
         """
         self._messages = []
+        self._role_index = None
+        self._token_index = None
         self.extend(messages)
 
     @property
@@ -120,6 +126,79 @@ class Chat:
         else:
             raise TypeError(f"Invalid message: {message}")
 
+    def _invalidate_index(self) -> None:
+        """Drop the cached indexes after a mutation."""
+        self._role_index = None
+        self._token_index = None
+
+    def by_role(self, role: RoleType) -> tuple[Message, ...]:
+        """
+        Returns all messages with the given role.
+
+        The per-role index is built lazily on first use and invalidated
+        whenever the chat is mutated, so repeated role-filtered lookups
+        avoid a full scan of the chat.
+
+        Args:
+            role (RoleType): The role to filter messages by.
+
+        Returns:
+            tuple[Message, ...]: Messages with the given role, in chat order.
+
+        Examples:
+            >>> from chat_object import Chat, Message, Role
+            >>> chat = Chat(
+            ...     Message(Role.User, "Hello"),
+            ...     Message(Role.Assistant, "Hi!"),
+            ...     Message(Role.User, "Bye"),
+            ... )
+            >>> [msg.content for msg in chat.by_role(Role.User)]
+            ['Hello', 'Bye']
+            >>> chat.by_role(Role.System)
+            ()
+
+            >>> chat.add(Message(Role.System, "Be brief"))
+            >>> len(chat.by_role(Role.System))
+            1
+        """
+        if self._role_index is None:
+            index: dict[str, list[Message]] = {}
+            for message in self._messages:
+                index.setdefault(message.role, []).append(message)
+            self._role_index = index
+        return tuple(self._role_index.get(role, ()))
+
+    def tail(self, n: int) -> tuple[Message, ...]:
+        """
+        Returns the last n messages of the chat.
+
+        Useful for building bounded context windows without copying or
+        stringifying the whole history first.
+
+        Args:
+            n (int): Number of trailing messages to return.
+
+        Returns:
+            tuple[Message, ...]: The last n messages, in chat order.
+
+        Examples:
+            >>> from chat_object import Chat, Message, Role
+            >>> chat = Chat(
+            ...     Message(Role.User, "Hello"),
+            ...     Message(Role.Assistant, "Hi!"),
+            ...     Message(Role.User, "Bye"),
+            ... )
+            >>> [msg.content for msg in chat.tail(2)]
+            ['Hi!', 'Bye']
+            >>> len(chat.tail(10))
+            3
+            >>> chat.tail(0)
+            ()
+        """
+        if n <= 0:
+            return ()
+        return tuple(self._messages[-n:])
+
     def add(self, message: MessageType) -> None:
         """
         Adds a single message to the chat.
@@ -143,6 +222,7 @@ class Chat:
             'Hi!'
         """
         self._messages.append(self._validate_message(message))
+        self._invalidate_index()
 
     def get_messages(self) -> list[Message]:
         """
@@ -187,7 +267,20 @@ class Chat:
             3
             >>> chat[2].content
             'How are you?'
-        """
+
+            >>> # Messages appended before a validation failure stay
+            >>> # visible to the cached indexes
+            >>> _ = chat.by_role(Role.User)
+            >>> chat.extend([Message(Role.User, "Bye"), 12345])
+            Traceback (most recent call last):
+                ...
+            TypeError: Invalid message: 12345
+            >>> len(chat.by_role(Role.User)) == len([m for m in chat if m.role == Role.User])
+            True
+        """
+        # Invalidate up front: if _validate_message raises mid-iterable,
+        # the messages already appended must not leave a stale index.
+        self._invalidate_index()
         for message in messages:
             self._messages.append(self._validate_message(message))
 
@@ -209,6 +302,7 @@ class Chat:
             ()
         """
         self._messages.clear()
+        self._invalidate_index()
 
     def as_dict(self) -> list[dict[str, str]]:
         """
@@ -261,6 +355,7 @@ class Chat:
             'system'
         """
         self._messages.insert(index, self._validate_message(message))
+        self._invalidate_index()
 
     def pop(self, index: int = -1) -> Message:
         """
@@ -275,6 +370,7 @@ class Chat:
             >>> len(chat)
             1
         """
+        self._invalidate_index()
         return self._messages.pop(index)
 
     def remove(self, message: MessageType) -> None:
@@ -293,6 +389,7 @@ class Chat:
         """
         validated_message = self._validate_message(message)
         self._messages.remove(validated_message)
+        self._invalidate_index()
 
     def index(self, message: MessageType) -> int:
         """
@@ -334,6 +431,7 @@ class Chat:
             'assistant'
         """
         self._messages.reverse()
+        self._invalidate_index()
 
     def sort(
         self, key: Callable[[Message], Any] = lambda x: x, reverse: bool = False
@@ -349,6 +447,7 @@ class Chat:
             'assistant'
         """
         self._messages.sort(key=key, reverse=reverse)
+        self._invalidate_index()
 
     def __contains__(self, string: str) -> bool:
         """
@@ -357,7 +456,25 @@ class Chat:
         True
         >>> "Goodbye" in Chat(Message(Role.Assistant, "Hello World!"))
         False
+
+        >>> # Repeated whole-word lookups hit the lazily built token index
+        >>> chat = Chat(Message(Role.User, "How do I write a decorator?"))
+        >>> "decorator" in chat
+        True
+        >>> "decor" in chat  # substrings still match via the full scan
+        True
         """
+        # Whole-word queries can be answered from a token-set hit without
+        # scanning every message; anything else (multi-word queries,
+        # substring matches) falls back to the linear scan.
+        if string and re.fullmatch(r"\w+", string):
+            if self._token_index is None:
+                tokens: set[str] = set()
+                for message in self._messages:
+                    tokens.update(re.findall(r"\w+", message.content))
+                self._token_index = tokens
+            if string in self._token_index:
+                return True
         return any(string in message for message in self._messages)
 
     def __str__(self) -> str:
@@ -454,6 +571,7 @@ class Chat:
         'assistant'
         """
         self._messages[index] = self._validate_message(message)
+        self._invalidate_index()
 
     def __delitem__(self, index: int) -> None:
         """
@@ -466,6 +584,7 @@ class Chat:
         'assistant'
         """
         del self._messages[index]
+        self._invalidate_index()
 
     def __iter__(self) -> Iterator[Message]:
         """
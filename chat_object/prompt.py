@@ -192,6 +192,32 @@ class Prompt:
         new_content = self.content.replace(old, new)
         return Prompt(new_content)
 
+    def format(self, **kwargs: object) -> "Prompt":
+        """
+        Return a new Prompt with str.format-style placeholders filled in.
+
+        The already-processed content is formatted directly and not
+        dedented again, so substituted values keep their indentation
+        exactly as passed.
+
+        Args:
+            **kwargs: Placeholder values.
+
+        Returns:
+            Prompt: New Prompt instance with placeholders substituted.
+
+        Examples:
+            >>> p = Prompt("Hello {name}")
+            >>> p2 = p.format(name="World")
+            >>> str(p2)
+            'Hello World'
+            >>> str(p)  # Original unchanged
+            'Hello {name}'
+        """
+        filled = Prompt()
+        filled.content = self.content.format(**kwargs)
+        return filled
+
     def copy(self) -> "Prompt":
         """
         Create a copy of the prompt.
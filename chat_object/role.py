@@ -49,18 +49,8 @@ class Role(str, Enum):
     Tool = "tool"
     Function = "function"
 
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, str):
-            return self.value == other
-        if isinstance(other, Role):
-            return super().__eq__(other)
-        return NotImplemented
-
     def __str__(self) -> str:
         return self.value
 
     def __repr__(self) -> str:
         return repr(self.value)
-
-    def __hash__(self) -> int:
-        return hash(self.value)
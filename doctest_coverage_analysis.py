@@ -1,5 +1,5 @@
 """
-usage: doctest_coverage_analysis.py [-h] [--recursive] [--no-recursive] [--format {text,summary,json,csv}] [--verbose] [--output OUTPUT] targets [targets ...]
+usage: doctest_coverage_analysis.py [-h] [--recursive | --no-recursive | -r] [--format {text,summary,json,csv}] [--verbose] [--output OUTPUT] targets [targets ...]
 
 Doctest coverage analysis tool
 
@@ -8,8 +8,8 @@ positional arguments:
 
 options:
   -h, --help            show this help message and exit
-  --recursive, -r       Recursively search directories for Python files (default: True)
-  --no-recursive        Disable recursive directory search
+  --recursive, --no-recursive, -r
+                        Recursively search directories for Python files (default: True)
   --format {text,summary,json,csv}, -f {text,summary,json,csv}
                         Output format (default: text)
   --verbose, -v         Enable verbose output
@@ -24,14 +24,71 @@ Examples:
   doctest_coverage_analysis.py . --format csv > results.csv
 """
 
-import re
 import io
+import os
 import ast
+import csv
+import sys
 import json
+import pickle
 import argparse
 import contextlib
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator
+
+FUNCTION_DEF_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+# Below this many files the worker-pool startup cost outweighs the win
+# from analyzing files in parallel.
+MIN_FILES_FOR_PARALLEL = 32
+
+# Parsed ASTs are cached here between runs so re-running the tool on an
+# unchanged tree skips ast.parse entirely.
+AST_CACHE_FILE = ".doctest_coverage_cache"
+
+
+class FileStats:
+    """Per-file coverage counters.
+
+    Kept in __slots__ so every increment in the hot per-node loops is a
+    slot store instead of a string-keyed dict hash and lookup.
+    """
+
+    __slots__ = (
+        "total_functions",
+        "total_classes",
+        "covered_functions",
+        "covered_classes",
+        "total_methods",
+        "covered_methods",
+    )
+
+    def __init__(self):
+        self.total_functions = self.total_classes = 0
+        self.covered_functions = self.covered_classes = 0
+        self.total_methods = self.covered_methods = 0
+
+
+def _scandir_py(path: str) -> Iterator[str]:
+    """Yield paths of .py files under path, recursing with os.scandir.
+
+    Uses the cached DirEntry metadata from scandir, avoiding the extra
+    stat() calls and per-entry Path construction of Path.rglob.
+    Unreadable directories are skipped, matching rglob's behaviour of
+    suppressing scan errors.
+    """
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scandir_py(entry.path)
+            elif entry.name.endswith(".py") and entry.is_file(follow_symlinks=False):
+                yield entry.path
 
 
 class DetailedDoctestAnalyzer:
@@ -41,65 +98,66 @@ class DetailedDoctestAnalyzer:
         self.results = {}
         self.verbose = verbose
         self.output_format = output_format
+        self._ast_cache: dict[str, tuple[int, ast.Module]] = {}
 
     def analyze_file_detailed(self, file_path: Path) -> dict:
         """Analyze doctest coverage for a single file with detailed breakdown."""
+        path_str = str(file_path)
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-        except (FileNotFoundError, PermissionError, UnicodeDecodeError) as e:
+            mtime_ns = os.stat(file_path).st_mtime_ns
+        except (FileNotFoundError, PermissionError) as e:
             return {"error": f"Error reading file: {e}"}
 
-        try:
-            tree = ast.parse(content)
-        except SyntaxError as e:
-            return {"error": f"Syntax error in file: {e}"}
-
-        analysis = {
+        cached = self._ast_cache.get(path_str)
+        if cached is not None and cached[0] == mtime_ns:
+            tree = cached[1]
+        else:
+            try:
+                source = file_path.read_bytes()
+            except (FileNotFoundError, PermissionError) as e:
+                return {"error": f"Error reading file: {e}"}
+
+            try:
+                # ast.parse accepts bytes and decodes them in the parser
+                # itself, so no Python-level decode pass or full-text
+                # string is needed.
+                tree = ast.parse(source, filename=path_str)
+            except (SyntaxError, ValueError) as e:
+                return {"error": f"Syntax error in file: {e}"}
+
+            self._ast_cache[path_str] = (mtime_ns, tree)
+
+        stats = FileStats()
+        classes = {}
+        functions = {}
+        analyze_class = self._analyze_class
+        analyze_function = self._analyze_function
+
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                classes[node.name] = analyze_class(node, stats)
+            elif isinstance(node, FUNCTION_DEF_TYPES):
+                func_info = analyze_function(node)
+                functions[node.name] = func_info
+                stats.total_functions += 1
+                if func_info["has_doctest"]:
+                    stats.covered_functions += 1
+
+        # Serialize the slot counters to a dict only at the output boundary.
+        return {
             "file": str(file_path),
-            "classes": {},
-            "functions": {},
-            "total_functions": 0,
-            "total_classes": 0,
-            "covered_functions": 0,
-            "covered_classes": 0,
-            "total_methods": 0,
-            "covered_methods": 0,
+            "classes": classes,
+            "functions": functions,
+            "total_functions": stats.total_functions,
+            "total_classes": stats.total_classes,
+            "covered_functions": stats.covered_functions,
+            "covered_classes": stats.covered_classes,
+            "total_methods": stats.total_methods,
+            "covered_methods": stats.covered_methods,
         }
 
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                class_info = self._analyze_class(node, content)
-                analysis["classes"][node.name] = class_info
-                analysis["total_classes"] += 1
-                if class_info["has_doctest"]:
-                    analysis["covered_classes"] += 1
-
-                analysis["total_methods"] += class_info["total_methods"]
-                analysis["covered_methods"] += class_info["covered_methods"]
-
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                if not self._is_inside_class(node, tree):  # type: ignore
-                    func_info = self._analyze_function(node, content)  # type: ignore
-                    analysis["functions"][node.name] = func_info
-                    analysis["total_functions"] += 1
-                    if func_info["has_doctest"]:
-                        analysis["covered_functions"] += 1
-
-        return analysis
-
-    def _is_inside_class(self, node: ast.FunctionDef, tree: ast.AST) -> bool:
-        """Check if a function is defined inside a class."""
-        for parent in ast.walk(tree):
-            if isinstance(parent, ast.ClassDef):
-                for child in ast.walk(parent):
-                    if child is node:
-                        return True
-        return False
-
-    def _analyze_class(self, node: ast.ClassDef, content: str) -> dict:
-        """Analyze a class for doctest coverage."""
+    def _analyze_class(self, node: ast.ClassDef, counts: FileStats) -> dict:
+        """Analyze a class for doctest coverage, bumping counts in place."""
         class_info = {
             "name": node.name,
             "has_doctest": False,
@@ -108,22 +166,32 @@ class DetailedDoctestAnalyzer:
             "covered_methods": 0,
         }
 
-        if node.body and isinstance(node.body[0], ast.Expr):
-            if isinstance(node.body[0].value, ast.Constant):
-                docstring = node.body[0].value.value
-                class_info["has_doctest"] = self._has_doctests([docstring])
+        docstring = ast.get_docstring(node, clean=False)
+        class_info["has_doctest"] = bool(docstring) and self._has_doctests(docstring)
+
+        counts.total_classes += 1
+        if class_info["has_doctest"]:
+            counts.covered_classes += 1
 
+        analyze_function = self._analyze_function
+        methods = class_info["methods"]
+        covered = total = 0
         for child in node.body:
-            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                method_info = self._analyze_function(child, content)  # type: ignore
-                class_info["methods"][child.name] = method_info
-                class_info["total_methods"] += 1
+            if isinstance(child, FUNCTION_DEF_TYPES):
+                method_info = analyze_function(child)  # type: ignore
+                methods[child.name] = method_info
+                total += 1
                 if method_info["has_doctest"]:
-                    class_info["covered_methods"] += 1
+                    covered += 1
+
+        class_info["total_methods"] = total
+        class_info["covered_methods"] = covered
+        counts.total_methods += total
+        counts.covered_methods += covered
 
         return class_info
 
-    def _analyze_function(self, node: ast.FunctionDef, content: str) -> dict:
+    def _analyze_function(self, node: ast.FunctionDef) -> dict:
         """Analyze a function for doctest coverage."""
         func_info = {
             "name": node.name,
@@ -131,26 +199,39 @@ class DetailedDoctestAnalyzer:
             "lineno": node.lineno if hasattr(node, "lineno") else 0,
         }
 
-        if node.body and isinstance(node.body[0], ast.Expr):
-            if isinstance(node.body[0].value, ast.Constant):
-                docstring = node.body[0].value.value
-                func_info["has_doctest"] = self._has_doctests([docstring])
+        docstring = ast.get_docstring(node, clean=False)
+        func_info["has_doctest"] = bool(docstring) and self._has_doctests(docstring)
 
         return func_info
 
-    def _has_doctests(self, lines: list[str]) -> bool:
-        """Check if lines contain doctest examples."""
-        content = "".join(lines)
-        patterns = [
-            r">>>\s+",
-            r"\.\.\.\s+",
-            r"Expecting:",
-        ]
+    def _has_doctests(self, docstring: str) -> bool:
+        """Check if a docstring contains doctest examples."""
+        if not docstring:
+            return False
+        # Most docstrings have no doctests, so probe with a single ">"
+        # first - a one-character membership test is a memchr scan. With
+        # no ">" there can be no ">>>" prompt, and "..." continuations are
+        # only meaningful under one, which leaves "Expecting:" as the lone
+        # remaining marker.
+        if ">" not in docstring:
+            return "Expecting:" in docstring
+        return ">>>" in docstring or "..." in docstring or "Expecting:" in docstring
+
+    def _load_ast_cache(self) -> None:
+        """Load the pickled AST cache from a previous run, if present."""
+        try:
+            with open(AST_CACHE_FILE, "rb") as f:
+                self._ast_cache = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError, AttributeError):
+            self._ast_cache = {}
 
-        for pattern in patterns:
-            if re.search(pattern, content):
-                return True
-        return False
+    def _save_ast_cache(self) -> None:
+        """Persist the AST cache for the next run; best effort only."""
+        try:
+            with open(AST_CACHE_FILE, "wb") as f:
+                pickle.dump(self._ast_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
 
     def find_python_files(self, path: Path, recursive: bool = True) -> list[Path]:
         """Find all Python files in the given path."""
@@ -161,9 +242,15 @@ class DetailedDoctestAnalyzer:
                 python_files.append(path)
         elif path.is_dir():
             if recursive:
-                python_files.extend(path.rglob("*.py"))
+                python_files.extend(Path(p) for p in _scandir_py(str(path)))
             else:
-                python_files.extend(path.glob("*.py"))
+                with os.scandir(str(path)) as it:
+                    python_files.extend(
+                        Path(entry.path)
+                        for entry in it
+                        if entry.name.endswith(".py")
+                        and entry.is_file(follow_symlinks=False)
+                    )
 
         return python_files
 
@@ -202,27 +289,47 @@ class DetailedDoctestAnalyzer:
             },
         }
 
-        for file_path in all_files:
-            analysis = self.analyze_file_detailed(file_path)
+        summary = results["summary"]
+        files = results["files"]
+        missing = summary["missing_doctests"]
+        # Per-file detail dicts are only kept when the output actually
+        # renders them; summary mode just needs the aggregate counters.
+        keep_details = self.output_format != "summary"
+
+        # Per-file analysis is independent and CPU-bound in ast.parse, so
+        # large runs are spread across a process pool; chunksize amortizes
+        # the pickling cost per task.
+        if len(all_files) >= MIN_FILES_FOR_PARALLEL:
+            # The disk cache is skipped here: shipping cached trees to the
+            # workers would bloat task pickling, and trees parsed in the
+            # workers never come back to be persisted.
+            with ProcessPoolExecutor() as executor:
+                analyses = list(
+                    executor.map(self.analyze_file_detailed, all_files, chunksize=16)
+                )
+        else:
+            self._load_ast_cache()
+            analyses = [self.analyze_file_detailed(file_path) for file_path in all_files]
+            self._save_ast_cache()
 
+        for file_path, analysis in zip(all_files, analyses):
             if "error" in analysis:
                 if self.verbose:
                     print(f"Error analyzing {file_path}: {analysis['error']}")
                 continue
 
-            results["files"][str(file_path)] = analysis
-            results["summary"]["total_files"] += 1
+            if keep_details:
+                files[str(file_path)] = analysis
+            summary["total_files"] += 1
 
-            results["summary"]["total_classes"] += analysis["total_classes"]
-            results["summary"]["total_functions"] += analysis["total_functions"]
-            results["summary"]["total_methods"] += analysis["total_methods"]
-            results["summary"]["covered_classes"] += analysis["covered_classes"]
-            results["summary"]["covered_functions"] += analysis["covered_functions"]
-            results["summary"]["covered_methods"] += analysis["covered_methods"]
+            summary["total_classes"] += analysis["total_classes"]
+            summary["total_functions"] += analysis["total_functions"]
+            summary["total_methods"] += analysis["total_methods"]
+            summary["covered_classes"] += analysis["covered_classes"]
+            summary["covered_functions"] += analysis["covered_functions"]
+            summary["covered_methods"] += analysis["covered_methods"]
 
-            self._collect_missing_doctests(
-                analysis, results["summary"]["missing_doctests"]
-            )
+            self._collect_missing_doctests(analysis, missing)
 
         return results
 
@@ -249,78 +356,85 @@ class DetailedDoctestAnalyzer:
         """Print detailed text results."""
         summary = results["summary"]
 
-        print("DOCTEST COVERAGE ANALYSIS")
-        print("=" * 60)
+        lines = []
+        append = lines.append
+
+        append("DOCTEST COVERAGE ANALYSIS")
+        append("=" * 60)
 
         for file_path, analysis in results["files"].items():
-            print(f"\n📁 {file_path}:")
-            print("-" * 40)
+            append(f"\n📁 {file_path}:")
+            append("-" * 40)
 
             if analysis["classes"]:
-                print(
+                append(
                     f"📦 CLASSES ({analysis['covered_classes']}/{analysis['total_classes']} with doctest):"
                 )
                 for class_name, class_info in analysis["classes"].items():
                     status = "✅" if class_info["has_doctest"] else "❌"
-                    print(f"   {status} {class_name}")
+                    append(f"   {status} {class_name}")
 
                     if class_info["methods"]:
-                        print(
+                        append(
                             f"      Methods ({class_info['covered_methods']}/{class_info['total_methods']} with doctest):"
                         )
                         for method_name, method_info in class_info["methods"].items():
                             method_status = "✅" if method_info["has_doctest"] else "❌"
-                            print(f"         {method_status} {method_name}")
-                    print()
+                            append(f"         {method_status} {method_name}")
+                    append("")
 
             if analysis["functions"]:
-                print(
+                append(
                     f"🔧 FUNCTIONS (top-level) ({analysis['covered_functions']}/{analysis['total_functions']} with doctest):"
                 )
                 for func_name, func_info in analysis["functions"].items():
                     status = "✅" if func_info["has_doctest"] else "❌"
-                    print(f"   {status} {func_name}")
-                print()
+                    append(f"   {status} {func_name}")
+                append("")
 
+        sys.stdout.write("\n".join(lines) + "\n")
         self._print_summary_only(summary)
 
     def _print_summary_only(self, summary: dict) -> None:
         """Print only summary statistics."""
-        print("=" * 60)
-        print("📊 SUMMARY STATISTICS:")
+        lines = []
+        append = lines.append
+
+        append("=" * 60)
+        append("📊 SUMMARY STATISTICS:")
 
-        print(f"   Files processed: {summary['total_files']}")
-        print()
+        append(f"   Files processed: {summary['total_files']}")
+        append("")
 
         class_coverage = (
             (summary["covered_classes"] / summary["total_classes"] * 100)
             if summary["total_classes"] > 0
             else 0
         )
-        print("   CLASSES:")
-        print(f"      Total: {summary['total_classes']}")
-        print(f"      With doctest: {summary['covered_classes']}")
-        print(f"      Coverage: {class_coverage:.1f}%")
+        append("   CLASSES:")
+        append(f"      Total: {summary['total_classes']}")
+        append(f"      With doctest: {summary['covered_classes']}")
+        append(f"      Coverage: {class_coverage:.1f}%")
 
         func_coverage = (
             (summary["covered_functions"] / summary["total_functions"] * 100)
             if summary["total_functions"] > 0
             else 0
         )
-        print("\n   FUNCTIONS (top-level):")
-        print(f"      Total: {summary['total_functions']}")
-        print(f"      With doctest: {summary['covered_functions']}")
-        print(f"      Coverage: {func_coverage:.1f}%")
+        append("\n   FUNCTIONS (top-level):")
+        append(f"      Total: {summary['total_functions']}")
+        append(f"      With doctest: {summary['covered_functions']}")
+        append(f"      Coverage: {func_coverage:.1f}%")
 
         method_coverage = (
             (summary["covered_methods"] / summary["total_methods"] * 100)
             if summary["total_methods"] > 0
             else 0
         )
-        print("\n   CLASS METHODS:")
-        print(f"      Total: {summary['total_methods']}")
-        print(f"      With doctest: {summary['covered_methods']}")
-        print(f"      Coverage: {method_coverage:.1f}%")
+        append("\n   CLASS METHODS:")
+        append(f"      Total: {summary['total_methods']}")
+        append(f"      With doctest: {summary['covered_methods']}")
+        append(f"      Coverage: {method_coverage:.1f}%")
 
         total_elements = (
             summary["total_classes"]
@@ -336,53 +450,66 @@ class DetailedDoctestAnalyzer:
             (covered_elements / total_elements * 100) if total_elements > 0 else 0
         )
 
-        print("\n   OVERALL COVERAGE (classes + functions + methods):")
-        print(f"      Total elements: {total_elements}")
-        print(f"      Covered with doctest: {covered_elements}")
-        print(f"      Coverage percentage: {overall_coverage:.1f}%")
+        append("\n   OVERALL COVERAGE (classes + functions + methods):")
+        append(f"      Total elements: {total_elements}")
+        append(f"      Covered with doctest: {covered_elements}")
+        append(f"      Coverage percentage: {overall_coverage:.1f}%")
 
-        print("\n💡 RECOMMENDATIONS:")
+        append("\n💡 RECOMMENDATIONS:")
         if overall_coverage >= 80:
-            print("   🟢 Excellent coverage! Project is well documented with examples.")
+            append("   🟢 Excellent coverage! Project is well documented with examples.")
         elif overall_coverage >= 60:
-            print(
+            append(
                 "   🟡 Good coverage. Consider adding doctest for remaining elements."
             )
         elif overall_coverage >= 40:
-            print(
+            append(
                 "   🟠 Average coverage. Recommended to add doctest for the following elements:"
             )
         else:
-            print(
+            append(
                 "   🔴 Low coverage. Critical to add doctest for the following elements:"
             )
 
         if summary["missing_doctests"]:
-            print("\n   📌 ELEMENTS WITHOUT DOCTEST:")
+            append("\n   📌 ELEMENTS WITHOUT DOCTEST:")
             for item_type, item_name in summary["missing_doctests"][:5]:
-                print(f"      • {item_type}: {item_name}")
+                append(f"      • {item_type}: {item_name}")
             if len(summary["missing_doctests"]) > 5:
-                print(
+                append(
                     f"      • and {len(summary['missing_doctests']) - 5} more elements..."
                 )
         else:
-            print("\n   ✅ All elements have doctest coverage!")
+            append("\n   ✅ All elements have doctest coverage!")
+
+        sys.stdout.write("\n".join(lines) + "\n")
 
     def _print_csv_results(self, results: dict) -> None:
         """Print results in CSV format."""
-        print("file,element_type,element_name,has_doctest")
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writerow = writer.writerow
+
+        writerow(["file", "element_type", "element_name", "has_doctest"])
 
         for file_path, analysis in results["files"].items():
             for class_name, class_info in analysis["classes"].items():
-                print(f"{file_path},class,{class_name},{class_info['has_doctest']}")
+                writerow([file_path, "class", class_name, class_info["has_doctest"]])
 
                 for method_name, method_info in class_info["methods"].items():
-                    print(
-                        f"{file_path},method,{class_name}.{method_name},{method_info['has_doctest']}"
+                    writerow(
+                        [
+                            file_path,
+                            "method",
+                            f"{class_name}.{method_name}",
+                            method_info["has_doctest"],
+                        ]
                     )
 
             for func_name, func_info in analysis["functions"].items():
-                print(f"{file_path},function,{func_name},{func_info['has_doctest']}")
+                writerow([file_path, "function", func_name, func_info["has_doctest"]])
+
+        sys.stdout.write(buffer.getvalue())
 
     def _collect_missing_doctests(
         self, analysis: dict, missing_list: list[tuple[str, str]]
@@ -422,13 +549,9 @@ Examples:
     parser.add_argument(
         "--recursive",
         "-r",
-        action="store_true",
+        action=argparse.BooleanOptionalAction,
         default=True,
-        help="Recursively search directories for Python files (default: True)",
-    )
-
-    parser.add_argument(
-        "--no-recursive", action="store_true", help="Disable recursive directory search"
+        help="Recursively search directories for Python files",
     )
 
     parser.add_argument(
@@ -449,9 +572,8 @@ Examples:
 
     args = parser.parse_args()
 
-    recursive = args.recursive and not args.no_recursive
     analyzer = DetailedDoctestAnalyzer(verbose=args.verbose, output_format=args.format)
-    results = analyzer.run_analysis(args.targets, recursive)
+    results = analyzer.run_analysis(args.targets, args.recursive)
 
     if args.output and args.format in ["json", "csv"]:
         with open(args.output, "w", encoding="utf-8") as f:
@@ -98,7 +98,7 @@ def demo_practical_scenarios():
     assert "user:" in api_result
     assert "assistant:" in api_result
 
-    user_messages = [msg for msg in bot_chat if msg.role == Role.User]
+    user_messages = bot_chat.by_role(Role.User)
     assert len(user_messages) == 2
 
     assert "Hello" in bot_chat
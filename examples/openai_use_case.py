@@ -1,9 +1,11 @@
+import asyncio
+import io
+import json
 import os
+import re
 import sys
+import time
 from typing import Optional
-from dotenv import load_dotenv
-
-load_dotenv(override=True)
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -16,17 +18,88 @@ from chat_object import (  # noqa: E402
     msg_system,
     Role,
 )
+from chat_object._cache import InMemoryBackend, LLMCache  # noqa: E402
+
+# The API clients are imported on first CodeReviewAssistant construction
+# rather than at module import, so importing this file (e.g. for the
+# prompt templates) stays cheap.
+httpx = None
+openai = None
+
+
+def _import_openai() -> None:
+    global httpx, openai
+    if openai is not None:
+        return
+    try:
+        import httpx as httpx_module
+        import openai as openai_module
+    except ImportError:
+        print("❌ OpenAI package not installed. Install it with: pip install openai")
+        print("This example requires the OpenAI package to work.")
+        sys.exit(1)
+    httpx = httpx_module
+    openai = openai_module
+
+
+MODEL = "gpt-4o-mini"
+MAX_TOKENS = 1000
+
+# Matches {{name}} placeholders so a template can be filled in one pass.
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+# The constant parts of the prompts are built (and dedented) once at
+# import; per-call construction only fills in the placeholders.
+_REVIEW_TEMPLATE = prmt("""
+    Please review this {language} code:
+
+    {code}
+
+    {context_line}
+
+    Provide a comprehensive code review including:
+    1. Potential bugs or issues
+    2. Code quality improvements
+    3. Performance optimizations
+    4. Best practices suggestions
+    5. Security considerations (if applicable)
+""")
+
+_IMPROVEMENT_TEMPLATE = prmt("""
+    Here's some code that needs improvement:
+
+    {code}
+
+    {focus_line}
+
+    Please provide:
+    1. Specific code improvements with examples
+    2. Alternative approaches
+    3. Explanation of why these changes are better
+    4. Any potential trade-offs to consider
+""")
 
-try:
-    import openai
-except ImportError:
-    print("❌ OpenAI package not installed. Install it with: pip install openai")
-    print("This example requires the OpenAI package to work.")
-    sys.exit(1)
+_EXPLAIN_TEMPLATE = prmt("""
+    Please explain what this code does:
+
+    {code}
+
+    Provide:
+    1. A clear, high-level explanation
+    2. Step-by-step breakdown of the logic
+    3. Key concepts and patterns used
+    4. Potential use cases
+""")
 
 
 class CodeReviewAssistant:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        temperature: float = 0.0,
+        cache: Optional[LLMCache] = None,
+    ):
+        _import_openai()
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             print(
@@ -35,7 +108,28 @@ class CodeReviewAssistant:
             print("You can get an API key from: https://platform.openai.com/api-keys")
             sys.exit(1)
 
-        openai.api_key = self.api_key
+        # One long-lived client: keep-alive connections avoid paying the
+        # TCP + TLS handshake on every request.
+        self._client = openai.OpenAI(
+            api_key=self.api_key,
+            http_client=httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+                timeout=60,
+            ),
+        )
+        # The async client is created lazily by _ensure_async_client so
+        # sync-only callers using `with` never open (or leak) it.
+        self._async_client = None
+        # Caps in-flight API calls so concurrent demos stay under rate limits.
+        self._semaphore = asyncio.Semaphore(3)
+        # Deterministic (temperature 0) responses are cached, so demo
+        # re-runs and retries skip the network round trip and token spend.
+        self.temperature = temperature
+        self._cache = (
+            cache
+            if cache is not None
+            else LLMCache(InMemoryBackend(max_entries=1024), ttl_seconds=3600)
+        )
 
         self.system_prompt = prmt("""
             You are an expert code reviewer and Python developer.
@@ -51,10 +145,35 @@ class CodeReviewAssistant:
         """)
 
         self.chat = chat()
+        # API-shaped mirror of self.chat, maintained by _append so each
+        # request reuses it instead of re-walking the whole chat.
+        self._messages_cache: list[dict] = []
         self._initialize_chat()
 
     def _initialize_chat(self):
-        self.chat.add(msg_system(self.system_prompt))
+        self._append(msg_system(self.system_prompt))
+
+    def _append(self, message) -> None:
+        """Add a message to the chat and its serialized mirror in lockstep."""
+        self.chat.add(message)
+        self._messages_cache.append({"role": message.role, "content": message.content})
+
+    def _review_prompt(self, code: str, language: str, context: str):
+        context_line = f"Context: {context}" if context else ""
+        return _REVIEW_TEMPLATE.format(
+            language=language, code=code, context_line=context_line
+        )
+
+    def _improvement_prompt(self, code: str, specific_issue: str):
+        focus_line = (
+            f"Focus on this specific issue: {specific_issue}"
+            if specific_issue
+            else "Suggest general improvements"
+        )
+        return _IMPROVEMENT_TEMPLATE.format(code=code, focus_line=focus_line)
+
+    def _explain_prompt(self, code: str):
+        return _EXPLAIN_TEMPLATE.format(code=code)
 
     def review_code(
         self, code: str, language: str = "Python", context: str = ""
@@ -70,32 +189,7 @@ class CodeReviewAssistant:
         Returns:
             AI response with code review feedback
         """
-        user_prompt = prmt(f"""
-            Please review this {language} code:
-            
-            {code}
-            
-            {f"Context: {context}" if context else ""}
-            
-            Provide a comprehensive code review including:
-            1. Potential bugs or issues
-            2. Code quality improvements
-            3. Performance optimizations
-            4. Best practices suggestions
-            5. Security considerations (if applicable)
-        """)
-
-        self.chat.add(msg_user(user_prompt))
-
-        try:
-            response = self._get_ai_response()
-            self.chat.add(msg_assistant(response))
-            return response
-
-        except Exception as e:
-            error_msg = f"Error getting AI response: {e}"
-            print(f"❌ {error_msg}")
-            return error_msg
+        return self._ask(self._review_prompt(code, language, context))
 
     def suggest_improvements(self, code: str, specific_issue: str = "") -> str:
         """
@@ -108,28 +202,7 @@ class CodeReviewAssistant:
         Returns:
             AI response with improvement suggestions
         """
-        improvement_prompt = prmt(f"""
-            Here's some code that needs improvement:
-            
-            {code}
-            
-            {f"Focus on this specific issue: {specific_issue}" if specific_issue else "Suggest general improvements"}
-            
-            Please provide:
-            1. Specific code improvements with examples
-            2. Alternative approaches
-            3. Explanation of why these changes are better
-            4. Any potential trade-offs to consider
-        """)
-
-        self.chat.add(msg_user(improvement_prompt))
-
-        try:
-            response = self._get_ai_response()
-            self.chat.add(msg_assistant(response))
-            return response
-        except Exception as e:
-            return f"Error: {e}"
+        return self._ask(self._improvement_prompt(code, specific_issue))
 
     def explain_code(self, code: str) -> str:
         """
@@ -141,69 +214,286 @@ class CodeReviewAssistant:
         Returns:
             AI response explaining the code
         """
-        explain_prompt = prmt(f"""
-            Please explain what this code does:
-            
-            {code}
-            
-            Provide:
-            1. A clear, high-level explanation
-            2. Step-by-step breakdown of the logic
-            3. Key concepts and patterns used
-            4. Potential use cases
-        """)
+        return self._ask(self._explain_prompt(code))
 
-        self.chat.add(msg_user(explain_prompt))
+    def _ask(self, user_prompt) -> str:
+        """Append the user message, call the API, append the reply.
 
+        Sync counterpart of _ask_async; all the sync public methods
+        funnel through here.
+        """
+        self._append(msg_user(user_prompt))
         try:
             response = self._get_ai_response()
-            self.chat.add(msg_assistant(response))
+            self._append(msg_assistant(response))
             return response
         except Exception as e:
-            return f"Error: {e}"
+            error_msg = f"Error getting AI response: {e}"
+            print(f"❌ {error_msg}")
+            return error_msg
 
-    def _get_ai_response(self) -> str:
+    async def _ask_async(self, user_prompt) -> str:
+        """Append the user message, await the API, append the reply.
+
+        The message list is snapshotted before awaiting so concurrent
+        calls don't see each other's replies mid-flight.
+        """
+        self._append(msg_user(user_prompt))
+        messages = self._build_messages()
         try:
-            messages = []
-            for m in self.chat:
-                messages.append({"role": m.role, "content": m.content})
+            response = await self._get_ai_response_async(messages)
+            self._append(msg_assistant(response))
+            return response
+        except Exception as e:
+            error_msg = f"Error getting AI response: {e}"
+            print(f"❌ {error_msg}")
+            return error_msg
+
+    async def review_code_async(
+        self, code: str, language: str = "Python", context: str = ""
+    ) -> str:
+        """Async variant of review_code, safe to run under asyncio.gather."""
+        return await self._ask_async(self._review_prompt(code, language, context))
+
+    async def suggest_improvements_async(
+        self, code: str, specific_issue: str = ""
+    ) -> str:
+        """Async variant of suggest_improvements."""
+        return await self._ask_async(self._improvement_prompt(code, specific_issue))
+
+    async def explain_code_async(self, code: str) -> str:
+        """Async variant of explain_code."""
+        return await self._ask_async(self._explain_prompt(code))
 
-            client = openai.OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
+    def bulk_analyze(self, code: str) -> dict:
+        """
+        Review, improve, and explain code in a single API request.
+
+        Asks the model for a JSON object with "review", "improvements",
+        and "explanation" keys, so one round trip (and one copy of the
+        code in the prompt) replaces three separate calls.
+
+        Args:
+            code: The code to analyze
+
+        Returns:
+            Dict with "review", "improvements", and "explanation" strings
+        """
+        prompt = prmt(f"""
+            Analyze the following code and respond with a JSON object
+            containing exactly these keys:
+            - "review": a code review covering quality, bugs, performance,
+              security, and best practices
+            - "improvements": specific improvement suggestions with examples
+            - "explanation": a clear explanation of what the code does
+
+            Code:
+            {code}
+        """)
+        self._append(msg_user(prompt))
+
+        response = self._client.chat.completions.create(
+            model=MODEL,
+            messages=self._build_messages(),
+            max_tokens=MAX_TOKENS,
+            temperature=self.temperature,
+            response_format={"type": "json_object"},
+        )
+        content = response.choices[0].message.content or "{}"
+        result = json.loads(content)
+        self._append(msg_assistant(content))
+        return result
+
+    def submit_batch(self, codes: list) -> str:
+        """
+        Submit code reviews through the Batch API for offline processing.
+
+        Batched requests run at half price and don't count against
+        real-time rate limits, which suits large review backlogs where
+        latency doesn't matter.
+
+        Args:
+            codes: Code snippets to review
+
+        Returns:
+            The batch id, for use with wait_for_batch
+        """
+        lines = []
+        for i, code in enumerate(codes):
+            request = {
+                "custom_id": f"review-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": MODEL,
+                    "messages": [
+                        {"role": "system", "content": str(self.system_prompt)},
+                        {
+                            "role": "user",
+                            "content": str(self._review_prompt(code, "Python", "")),
+                        },
+                    ],
+                    "max_tokens": MAX_TOKENS,
+                    "temperature": self.temperature,
+                },
+            }
+            lines.append(json.dumps(request))
+
+        input_file = self._client.files.create(
+            file=io.BytesIO("\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self._client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def wait_for_batch(self, batch_id: str) -> list:
+        """
+        Poll a batch until it finishes and return its responses.
+
+        Args:
+            batch_id: Id returned by submit_batch
+
+        Returns:
+            Response contents ordered by custom_id
+        """
+        # Poll with exponential backoff; batches typically take minutes
+        # to hours, so there's no point hammering the endpoint.
+        delay = 5
+        while True:
+            batch = self._client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, 300)
+
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch_id} ended with status {batch.status}")
+
+        output = self._client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.text.splitlines():
+            entry = json.loads(line)
+            body = entry["response"]["body"]
+            results[entry["custom_id"]] = body["choices"][0]["message"]["content"]
+        order = sorted(results, key=lambda cid: int(cid.rsplit("-", 1)[1]))
+        return [results[custom_id] for custom_id in order]
+
+    def _build_messages(self) -> list[dict]:
+        """Snapshot the chat as the message dicts the API expects."""
+        return list(self._messages_cache)
+
+    def _get_ai_response(self) -> str:
+        messages = self._build_messages()
+        key = self._cache.cache_key(MODEL, messages, self.temperature, MAX_TOKENS)
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        # API errors propagate as-is: callers already catch Exception, and
+        # the original type keeps the status code and request id intact.
+        stream = self._client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            max_tokens=MAX_TOKENS,
+            temperature=self.temperature,
+            stream=True,
+        )
+
+        # Echo tokens as they arrive, but flush in growing batches
+        # (1, 3, 9, 27, then 50) so stdout writes don't dominate.
+        chunks: list[str] = []
+        pending: list[str] = []
+        batch_size = 1
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            chunks.append(delta)
+            pending.append(delta)
+            if len(pending) >= batch_size:
+                sys.stdout.write("".join(pending))
+                sys.stdout.flush()
+                pending.clear()
+                batch_size = min(batch_size * 3, 50)
+        if pending:
+            sys.stdout.write("".join(pending))
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+
+        if not chunks:
+            return "No response content received"
+        content = "".join(chunks)
+
+        if key is not None:
+            self._cache.set(key, content)
+        return content
+
+    def _ensure_async_client(self):
+        """Create the AsyncOpenAI client on first async use."""
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(api_key=self.api_key)
+        return self._async_client
+
+    async def _get_ai_response_async(self, messages: list[dict]) -> str:
+        key = self._cache.cache_key(MODEL, messages, self.temperature, MAX_TOKENS)
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        client = self._ensure_async_client()
+        async with self._semaphore:
+            response = await client.chat.completions.create(
+                model=MODEL,
                 messages=messages,
-                max_tokens=1000,
-                temperature=0.7,
+                max_tokens=MAX_TOKENS,
+                temperature=self.temperature,
             )
 
-            content = response.choices[0].message.content
-            if content is None:
-                return "No response content received"
-            return content
+        content = response.choices[0].message.content
+        if content is None:
+            return "No response content received"
 
-        except openai.OpenAIError as e:
-            raise Exception(f"OpenAI API error: {e}")
+        if key is not None:
+            self._cache.set(key, content)
+        return content
 
     def get_chat_history(self) -> str:
         return str(self.chat)
 
     def clear_history(self):
         self.chat.clear()
+        self._messages_cache.clear()
         self._initialize_chat()
 
+    def close(self):
+        self._client.close()
 
-def main():
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+
+    def __enter__(self) -> "CodeReviewAssistant":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+async def run_demo():
     print("🤖 CODE REVIEW ASSISTANT DEMO")
     print("=" * 50)
     print("This example uses chat-object components with OpenAI API")
     print("to create a practical code review assistant.\n")
 
-    assistant = CodeReviewAssistant()
-
-    print("📝 EXAMPLE 1: Code Review")
-    print("-" * 30)
-
-    sample_code = """
+    # The context manager closes the shared HTTP client on exit.
+    with CodeReviewAssistant() as assistant:
+        sample_code = """
 def calculate_fibonacci(n):
     if n <= 1:
         return n
@@ -214,19 +504,7 @@ result = calculate_fibonacci(10)
 print(f"Fibonacci(10) = {result}")
 """
 
-    print("Code to review:")
-    print(sample_code)
-
-    print("\n🤖 AI Review:")
-    review = assistant.review_code(
-        sample_code, "Python", "This is a recursive Fibonacci implementation"
-    )
-    print(review)
-
-    print("\n\n🔧 EXAMPLE 2: Code Improvements")
-    print("-" * 30)
-
-    inefficient_code = """
+        inefficient_code = """
 def find_duplicates(items):
     duplicates = []
     for i in range(len(items)):
@@ -236,19 +514,7 @@ def find_duplicates(items):
     return duplicates
 """
 
-    print("Code to improve:")
-    print(inefficient_code)
-
-    print("\n🤖 AI Suggestions:")
-    improvements = assistant.suggest_improvements(
-        inefficient_code, "performance optimization"
-    )
-    print(improvements)
-
-    print("\n\n📚 EXAMPLE 3: Code Explanation")
-    print("-" * 30)
-
-    complex_code = """
+        complex_code = """
 from functools import reduce
 from typing import List, Callable
 
@@ -269,17 +535,48 @@ pipeline = compose(square, multiply_by_two, add_one)
 result = pipeline(5)  # ((5^2) * 2) + 1 = 51
 """
 
-    print("Code to explain:")
-    print(complex_code)
-
-    print("\n🤖 AI Explanation:")
-    explanation = assistant.explain_code(complex_code)
-    print(explanation)
-
-    print("\n\n💬 EXAMPLE 4: Chat History")
-    print("-" * 30)
-    print("Full conversation history:")
-    print(assistant.get_chat_history())
+        print("📝 EXAMPLE 1: Code Review")
+        print("-" * 30)
+        print("Code to review:")
+        print(sample_code)
+
+        print("\n🔧 EXAMPLE 2: Code Improvements")
+        print("-" * 30)
+        print("Code to improve:")
+        print(inefficient_code)
+
+        print("\n📚 EXAMPLE 3: Code Explanation")
+        print("-" * 30)
+        print("Code to explain:")
+        print(complex_code)
+
+        # The three prompts are independent, so overlap their round trips
+        # instead of paying three sequential API latencies.
+        review, improvements, explanation = await asyncio.gather(
+            assistant.review_code_async(
+                sample_code, "Python", "This is a recursive Fibonacci implementation"
+            ),
+            assistant.suggest_improvements_async(
+                inefficient_code, "performance optimization"
+            ),
+            assistant.explain_code_async(complex_code),
+        )
+
+        print("\n🤖 AI Review:")
+        print(review)
+
+        print("\n\n🤖 AI Suggestions:")
+        print(improvements)
+
+        print("\n\n🤖 AI Explanation:")
+        print(explanation)
+
+        print("\n\n💬 EXAMPLE 4: Chat History")
+        print("-" * 30)
+        print("Full conversation history:")
+        print(assistant.get_chat_history())
+
+        await assistant.aclose()
 
     print("\n\n🎯 EXAMPLE 5: Advanced Prompt Usage")
     print("-" * 30)
@@ -295,12 +592,17 @@ result = pipeline(5)  # ((5^2) * 2) + 1 = 51
         Please provide {{type}} feedback.
     """)
 
-    filled_prompt = template.replace("{{role}}", "Python security")
-    filled_prompt = filled_prompt.replace("{{task}}", "security audit")
-    filled_prompt = filled_prompt.replace(
-        "{{code}}", "import os; os.system('rm -rf /')"
+    # One regex pass fills every placeholder instead of rebuilding the
+    # prompt once per .replace() call.
+    values = {
+        "role": "Python security",
+        "task": "security audit",
+        "code": "import os; os.system('rm -rf /')",
+        "type": "security-focused",
+    }
+    filled_prompt = prmt(
+        _PLACEHOLDER_RE.sub(lambda m: values[m.group(1)], str(template))
     )
-    filled_prompt = filled_prompt.replace("{{type}}", "security-focused")
 
     print("Template prompt:")
     print(template)
@@ -337,5 +639,15 @@ result = pipeline(5)  # ((5^2) * 2) + 1 = 51
     print("• Practical code review functionality")
 
 
+def main():
+    # Only touch the filesystem for a .env file when the key isn't
+    # already in the environment.
+    if not os.getenv("OPENAI_API_KEY"):
+        from dotenv import load_dotenv
+
+        load_dotenv()
+    asyncio.run(run_demo())
+
+
 if __name__ == "__main__":
     main()
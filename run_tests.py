@@ -1,30 +1,79 @@
 import doctest
+import importlib
 import sys
-from typing import List
+from typing import List, Tuple
 
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.text import Text
-from rich.progress import (
-    Progress,
-    SpinnerColumn,
-    BarColumn,
-    TextColumn,
-    TimeElapsedColumn,
-)
+# Finder is stateless across modules, so one instance serves every run.
+_finder = doctest.DocTestFinder()
 
 
-console = Console()
+def _run_module(module_name: str) -> Tuple[int, int, str, list]:
+    """Run one module's doctests and return (tests, failures, status, details)."""
+    module_tests = 0
+    module_failures = 0
+    status = ""
+    failed_tests_details = []
+    try:
+        module = importlib.import_module(module_name)
+        tests = _finder.find(module)
+
+        if not tests:
+            status = "[yellow]No doctests[/yellow]"
+        else:
+            runner = doctest.DocTestRunner(verbose=False)
+            for test in tests:
+                result = runner.run(test)
+                module_failures += result.failed
+                module_tests += result.attempted
+                # If there are failures, rerun with verbose and capture output
+                if result.failed > 0:
+                    import io
+
+                    output = io.StringIO()
+                    runner_verbose = doctest.DocTestRunner(
+                        verbose=True,
+                        optionflags=doctest.REPORT_ONLY_FIRST_FAILURE,
+                    )
+                    runner_verbose.run(test, out=output.write)
+                    failed_tests_details.append((test.name, output.getvalue()))
+            if module_tests == 0:
+                status = "[yellow]No doctests[/yellow]"
+            elif module_failures == 0:
+                status = "[green]✅ Passed[/green]"
+            else:
+                status = f"[red]❌ {module_failures} failed[/red]"
+    except ImportError:
+        status = "[red]❌ Import error[/red]"
+        module_failures = 1
+    except Exception:
+        status = "[red]❌ Error[/red]"
+        module_failures = 1
+    return module_tests, module_failures, status, failed_tests_details
 
 
 def run_doctests() -> int:
+    # rich is only needed for reporting, so it is imported here rather
+    # than at module load; --help and import-time costs stay minimal.
+    from rich.console import Console
+    from rich.table import Table
+    from rich.panel import Panel
+    from rich.text import Text
+    from rich.progress import (
+        Progress,
+        SpinnerColumn,
+        BarColumn,
+        TextColumn,
+        TimeElapsedColumn,
+    )
+
+    console = Console()
     modules: List[str] = [
         "chat_object.consts",
         "chat_object.message",
         "chat_object.chat_obj",
         "chat_object.prompt",
         "chat_object.qol",
+        "chat_object._cache",
     ]
 
     total_failures: int = 0
@@ -50,58 +99,22 @@ def run_doctests() -> int:
         console=console,
     ) as progress:
         task = progress.add_task("[cyan]Testing modules...", total=len(modules))
+        # Modules run one at a time: DocTestRunner.run swaps the
+        # process-global sys.stdout while capturing example output, so
+        # concurrent runners corrupt each other's captures.
         for module_name in modules:
-            module_tests = 0
-            module_failures = 0
-            status = ""
-            failed_tests_details = []
-            try:
-                module = __import__(module_name, fromlist=["*"])
-                finder = doctest.DocTestFinder()
-                tests = finder.find(module)
-
-                if not tests:
-                    status = "[yellow]No doctests[/yellow]"
-                else:
-                    for test in tests:
-                        runner = doctest.DocTestRunner(verbose=False)
-                        result = runner.run(test)
-                        module_failures += result.failed
-                        module_tests += result.attempted
-                        # If there are failures, rerun with verbose and capture output
-                        if result.failed > 0:
-                            import io
-
-                            output = io.StringIO()
-                            runner_verbose = doctest.DocTestRunner(
-                                verbose=True,
-                                optionflags=doctest.REPORT_ONLY_FIRST_FAILURE,
-                            )
-                            runner_verbose.run(test, out=output.write)
-                            failed_tests_details.append((test.name, output.getvalue()))
-                    if module_tests == 0:
-                        status = "[yellow]No doctests[/yellow]"
-                    elif module_failures == 0:
-                        status = "[green]✅ Passed[/green]"
-                    else:
-                        status = f"[red]❌ {module_failures} failed[/red]"
-                total_failures += module_failures
-                total_tests += module_tests
-            except ImportError:
-                status = "[red]❌ Import error[/red]"
-                module_failures = 1
-                total_failures += 1
-            except Exception:
-                status = "[red]❌ Error[/red]"
-                module_failures = 1
-                total_failures += 1
+            module_tests, module_failures, status, failed_tests_details = _run_module(
+                module_name
+            )
+            progress.update(task, advance=1)
+            total_failures += module_failures
+            total_tests += module_tests
             table.add_row(
                 f"[cyan]{module_name}[/cyan]",
                 str(module_tests),
                 str(module_failures),
                 status,
             )
-            progress.update(task, advance=1)
 
             # Print failed test details if any
             if failed_tests_details:
@@ -141,6 +154,9 @@ def run_doctests() -> int:
 
 def main() -> None:
     """Main entry point."""
+    from rich.console import Console
+
+    console = Console()
     try:
         exit_code = run_doctests()
         sys.exit(exit_code)